@@ -1,18 +1,61 @@
+import io
+import contextlib
+import functools
 import re
-import sys
-import os
 import datetime as dt
+import numpy as np
 import pandas as pd
-from typing import Dict
+from typing import Dict, FrozenSet, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import yfinance as yf
-from bs4 import BeautifulSoup
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional, without it the weekly aggregation is done by pandas
+    njit = None
 
-def check_input_params(start_date: str, end_date: str, loading_path: str, by_day: bool = False) -> None:
+
+_SESSION = requests.Session()  # shared connection pool, retries on occasional 5xx of the data sources
+_MAX_WORKERS = 16  # cap of the download threads, the connection pool keeps as many connections alive
+_ADAPTER = HTTPAdapter(pool_maxsize=_MAX_WORKERS,
+                       max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504]))
+_SESSION.mount('http://', _ADAPTER)
+_SESSION.mount('https://', _ADAPTER)
+_BOP_RE = re.compile(rb'57-bop_[\w\-]+\.xlsx')
+
+
+@functools.lru_cache(maxsize=4)
+def _list_bop_files(url: str) -> FrozenSet[str]:
+    """
+    Get names of the balance files listed on the given page (the result is cached per url).
+    """
+    response = _SESSION.get(url)
+    response.raise_for_status()  # raise instead of caching an empty listing
+    filenames = frozenset(match.decode() for match in _BOP_RE.findall(response.content))
+    if len(filenames) == 0:
+        raise Exception(f'No balance files were found on {url}')
+
+    return filenames
+
+
+def check_loading_path(loading_path: str) -> None:
+    """
+    Check whether loading_path has a supported suffix or not.
+    """
+    if not loading_path.endswith(('.feather', '.parquet', '.csv')):
+        raise Exception('Parameter loading_path must end with \'.feather\', \'.parquet\' or \'.csv\' '
+                        '(Example: your_path.feather)')
+
+
+def check_input_params(start_date: str, end_date: str, loading_path: str,
+                       by_day: bool = False) -> Tuple[dt.datetime, dt.datetime]:
     """
     Check whether the input params have appropriate format or not.
+    Return start_date, end_date parsed to datetime.
     """
     try:
         start_date = dt.datetime.strptime(start_date, '%Y-%m-%d')
@@ -23,21 +66,152 @@ def check_input_params(start_date: str, end_date: str, loading_path: str, by_day
     if start_date > end_date:
         raise Exception('start_date must be <= end_date')
 
-    if re.search(r'\.csv$', loading_path) is None:
-        raise Exception('Parameter loading_path must end with \'.csv\' (Example: your_path.csv)')
+    check_loading_path(loading_path)
 
     if not isinstance(by_day, bool):
         raise TypeError('Parameter by_day must be boolean type')
 
+    return start_date, end_date
+
+
+def week_number(dates: pd.Series) -> np.ndarray:
+    """
+    Get Monday-based week numbers counted from the epoch (1970-01-01 is a Thursday, hence the shift by 3 days).
+    Unlike ISO week numbers they are unique across years, so they can be used as a groupby key as is.
+    """
+    days = dates.to_numpy().astype('datetime64[D]').astype(np.int64)
+    return (days + 3) // 7
+
+
+def _weekly_kernel(starts: np.ndarray, ends: np.ndarray, dates: np.ndarray, open_: np.ndarray, low: np.ndarray,
+                   high: np.ndarray, close: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """
+    Aggregate sorted daily rates by runs [starts[i], ends[i]) in a single pass:
+    min/max of Date, mean of Open/Close, min of Low, max of High (NaN are skipped as pandas does).
+    """
+    n = starts.shape[0]
+    start_week = np.empty(n, dtype=np.int64)
+    end_week = np.empty(n, dtype=np.int64)
+    out_open = np.full(n, np.nan)
+    out_low = np.full(n, np.nan)
+    out_high = np.full(n, np.nan)
+    out_close = np.full(n, np.nan)
+
+    for g in range(n):
+        date_min = dates[starts[g]]
+        date_max = dates[starts[g]]
+        open_sum, open_cnt = 0.0, 0
+        close_sum, close_cnt = 0.0, 0
+        for i in range(starts[g], ends[g]):
+            date_min = min(date_min, dates[i])
+            date_max = max(date_max, dates[i])
+            if not np.isnan(open_[i]):
+                open_sum += open_[i]
+                open_cnt += 1
+            if not np.isnan(close[i]):
+                close_sum += close[i]
+                close_cnt += 1
+            if not np.isnan(low[i]) and (np.isnan(out_low[g]) or low[i] < out_low[g]):
+                out_low[g] = low[i]
+            if not np.isnan(high[i]) and (np.isnan(out_high[g]) or high[i] > out_high[g]):
+                out_high[g] = high[i]
+
+        start_week[g] = date_min
+        end_week[g] = date_max
+        if open_cnt > 0:
+            out_open[g] = open_sum / open_cnt
+        if close_cnt > 0:
+            out_close[g] = close_sum / close_cnt
+
+    return start_week, end_week, out_open, out_low, out_high, out_close
+
+
+if njit is not None:
+    _weekly_kernel = njit(cache=True)(_weekly_kernel)
+
+
+def aggregate_weekly_rates(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregate daily currency rates by (Symbol, Week) with the numba kernel.
+    Symbol must be categorical, the result matches the pandas groupby of CurrencyRate.transform.
+    """
+    codes = frame['Symbol'].cat.codes.to_numpy()
+    weeks = frame['Week'].to_numpy()
+    order = np.lexsort((weeks, codes))
+    codes, weeks = codes[order], weeks[order]
+
+    starts = np.concatenate(([0], np.flatnonzero((np.diff(codes) != 0) | (np.diff(weeks) != 0)) + 1))
+    ends = np.append(starts[1:], codes.shape[0])
+
+    dates = frame['Date']
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)  # the kernel works on the int64 view of naive datetime64
+    dates = dates.to_numpy()[order]
+    columns = [frame[col].to_numpy(dtype=np.float64)[order] for col in ['Open', 'Low', 'High', 'Close']]
+    start_week, end_week, *values = _weekly_kernel(starts, ends, dates.view(np.int64), *columns)
+
+    result = pd.DataFrame({
+        'Symbol': pd.Categorical.from_codes(codes[starts], dtype=frame['Symbol'].dtype),
+        'Start_Week': start_week.view(dates.dtype),
+        'End_Week': end_week.view(dates.dtype)
+    })
+    for col, value in zip(['Open', 'Low', 'High', 'Close'], values):
+        result[col] = value
+
+    return result
+
+
+def concat_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate frames of separate chunks, empty ones are skipped so that they don't spoil dtypes of the others.
+    """
+    non_empty = [frame for frame in frames if frame.shape[0] > 0]
+    return pd.concat(non_empty or frames[:1], ignore_index=True, copy=False)
+
+
+def restore_categories(frame: pd.DataFrame, keys: List[str], sort_by: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Chunks transformed separately have different categories, so concatenating them turns categorical keys
+    into object columns and loses the groupby order. Restore the dtype of keys and, if sort_by is given, the order
+    that a single groupby over the whole frame gives.
+    """
+    if sort_by is not None:
+        frame = frame.sort_values(sort_by, ignore_index=True)
+    frame[keys] = frame[keys].astype('category')
+
+    return frame
+
+
+def save_frame(frame: pd.DataFrame, loading_path: str) -> None:
+    """
+    Save the frame to loading_path, the format is chosen by the file suffix (.feather, .parquet or .csv).
+    """
+    frame = frame.reset_index(drop=True)
+    num_cols = frame.select_dtypes(include='float').columns
+    frame[num_cols] = frame[num_cols].round(2)
+
+    if loading_path.endswith('.feather'):
+        frame.to_feather(loading_path)
+    elif loading_path.endswith('.parquet'):
+        frame.to_parquet(loading_path, compression='snappy', index=False)
+    else:
+        # 1 MiB buffer, few write() calls; utf-8 as to_csv(path) writes regardless of the locale
+        with open(loading_path, 'w', buffering=1 << 20, newline='', encoding='utf-8') as f:
+            frame.to_csv(f, index=False, date_format="%Y-%m-%d")
+
 
 class HiddenPrints:
+    """
+    Hide prints (of yfinance) by redirecting stdout to an in-memory buffer.
+    redirect_stdout swaps the process-wide sys.stdout, so it is not thread-safe: prints of other threads are
+    swallowed meanwhile and overlapping HiddenPrints blocks must not be run concurrently.
+    """
     def __enter__(self):
-        self._original_stdout = sys.stdout
-        sys.stdout = open(os.devnull, 'w')
+        self._redirect = contextlib.redirect_stdout(io.StringIO())
+        self._redirect.__enter__()
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        sys.stdout.close()
-        sys.stdout = self._original_stdout
+        self._redirect.__exit__(exc_type, exc_val, exc_tb)
 
 
 class CurrencyRate(object):
@@ -52,46 +226,63 @@ class CurrencyRate(object):
 
         :param start_date: given start date (format: ISO 8601 date (YYYY-MM-DD))
         :param end_date: given end date (format: ISO 8601 date (YYYY-MM-DD))
-        :param loading_path: path to where data should be loaded (format: your_path.csv)
+        :param loading_path: path to where data should be loaded (format: your_path.feather/.parquet/.csv)
         :param by_day: if True then data will be loaded by day otherwise by week
         """
 
-        check_input_params(start_date, end_date, loading_path, by_day)
+        start_dt, end_dt = check_input_params(start_date, end_date, loading_path, by_day)
 
-        self.start_date = dt.datetime.strptime(start_date, '%Y-%m-%d') + dt.timedelta(days=1)
-        self.end_date = dt.datetime.strptime(end_date, '%Y-%m-%d') + dt.timedelta(days=1)
+        self.start_date = start_dt + dt.timedelta(days=1)
+        self.end_date = end_dt + dt.timedelta(days=1)
         self.loading_path = loading_path
         self.by_day = by_day
 
         self.currency = ['TRY', 'MAD', 'INR', 'IDR', 'RUB', 'SAR', 'VES']
+        self.tickers = [cur + '=X' for cur in self.currency]
 
-    def extract(self) -> pd.DataFrame:
-        tickers = ','.join(cur + '=X' for cur in self.currency)
+    def _fetch_ticker(self, ticker: str) -> pd.DataFrame:
+        """
+        Download daily rates of the given ticker in long format (columns Date, Symbol, ...).
+        """
+        frame = yf.Ticker(ticker).history(start=self.start_date, end=self.end_date, interval='1d',
+                                          actions=False, auto_adjust=False)
+        if isinstance(frame.index, pd.DatetimeIndex) and frame.index.tz is not None:
+            # history() localizes daily bars to the exchange timezone, keep plain dates as yf.download does
+            frame.index = frame.index.tz_localize(None)
+        frame = frame[['Open', 'High', 'Low', 'Close']].rename_axis('Date').reset_index()
+        frame.insert(1, 'Symbol', ticker)
 
+        return frame
+
+    def extract(self) -> pd.DataFrame:
         with HiddenPrints():
-            frame = yf.download(tickers, start=self.start_date, end=self.end_date, interval='1d', group_by='Ticker')
+            with ThreadPoolExecutor(max_workers=len(self.tickers)) as executor:
+                frames = list(executor.map(self._fetch_ticker, self.tickers))
 
-        frame = frame.stack(level=0).rename_axis(['Date', 'Symbol']).reset_index()
+        # tickers are already in long format, so just stack them vertically (tickers without data are skipped)
+        frame = concat_frames(frames)
 
         return frame
 
     def transform(self, frame: pd.DataFrame) -> pd.DataFrame:
-        frame.drop(columns=['Adj Close', 'Volume'], inplace=True)
-
         if frame.shape[0] == 0:
             if self.by_day:
                 return frame
             else:
-                return pd.DataFrame([], columns=['Symbol', 'Start Week', 'End Week', 'Open', 'Low', 'High', 'Close'])
+                return pd.DataFrame([], columns=['Symbol', 'Start_Week', 'End_Week', 'Open', 'Low', 'High', 'Close'])
 
-        frame['Symbol'] = 'USD/' + frame['Symbol'].str.replace('=X', '')
+        frame['Symbol'] = 'USD/' + frame['Symbol'].str.replace('=X', '', regex=False)
 
         if self.by_day:
             return frame
 
         # transform to weekly data format
-        frame['Week'] = frame['Date'].dt.isocalendar().week
-        frame = frame.groupby(['Symbol', 'Week'], as_index=False).agg(
+        frame['Symbol'] = frame['Symbol'].astype('category')  # group by integer codes instead of strings
+        frame['Week'] = week_number(frame['Date'])
+        if njit is not None:
+            return aggregate_weekly_rates(frame)
+
+        frame = frame.groupby(['Symbol', 'Week'], as_index=False, observed=True).agg(
             Start_Week=pd.NamedAgg(column='Date', aggfunc='min'),
             End_Week=pd.NamedAgg(column='Date', aggfunc='max'),
             Open=pd.NamedAgg(column='Open', aggfunc='mean'),
@@ -104,13 +295,28 @@ class CurrencyRate(object):
         return frame
 
     def load(self, frame: pd.DataFrame) -> None:
-        frame.to_csv(self.loading_path, index=False, date_format="%Y-%m-%d", float_format='%.2f')
+        save_frame(frame, self.loading_path)
 
     def run(self) -> None:
         frames = self.extract()
         frame = self.transform(frames)
         self.load(frame)
 
+    def run_parallel(self, max_workers: int = 8) -> None:
+        """
+        The same as run(), but every ticker is extracted and transformed in its own thread.
+        The output matches the one of run().
+        """
+        with HiddenPrints():
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                frames = list(executor.map(lambda ticker: self.transform(self._fetch_ticker(ticker)), self.tickers))
+
+        frame = concat_frames(frames)
+        if not self.by_day:
+            frame = restore_categories(frame, ['Symbol'], sort_by=['Symbol', 'Start_Week'])
+
+        self.load(frame)
+
 
 class AvgTemp(object):
     """
@@ -131,7 +337,7 @@ class AvgTemp(object):
 
         :param start_date: given start date (format: ISO 8601 date (YYYY-MM-DD))
         :param end_date: given end date (format: ISO 8601 date (YYYY-MM-DD))
-        :param loading_path: path to where data should be loaded (format: your_path.csv)
+        :param loading_path: path to where data should be loaded (format: your_path.feather/.parquet/.csv)
         :param by_day: if True then data will be loaded by day otherwise by week
         """
 
@@ -150,26 +356,35 @@ class AvgTemp(object):
             '98429099999': 'RPLL'
         }
 
-    def extract(self) -> pd.DataFrame:
+    def _fetch_stations(self, stations: List[str]) -> pd.DataFrame:
+        """
+        Download daily temperature of the given stations.
+        """
         url = [
             'https://www.ncei.noaa.gov/access/services/data/v1?',
             'dataset=global-summary-of-the-day',
             'dataTypes=TEMP',
-            'stations=' + ','.join(self.code_airport.keys()),
+            'stations=' + ','.join(stations),
             'options=includeStationName:true',
             'startDate=' + self.start_date,
             'endDate=' + self.end_date
         ]
 
         url = '&'.join(url)
-        frame = pd.read_csv(url,
-                            parse_dates=['DATE'],
-                            converters={'STATION': lambda x: self.code_airport.get(x, 'UNKNOWN')})
+        response = _SESSION.get(url, headers={'Accept-Encoding': 'gzip'})
+        response.raise_for_status()
+        frame = pd.read_csv(io.BytesIO(response.content), usecols=['STATION', 'NAME', 'DATE', 'TEMP'],
+                            dtype={'STATION': str, 'TEMP': np.float32})
+        frame['DATE'] = pd.to_datetime(frame['DATE'], format='%Y-%m-%d', cache=True)  # NOAA dates are ISO 8601
+        frame['STATION'] = frame['STATION'].map(self.code_airport).fillna('UNKNOWN').astype('category')
 
         return frame
 
+    def extract(self) -> pd.DataFrame:
+        return self._fetch_stations(list(self.code_airport.keys()))
+
     def transform(self, frame: pd.DataFrame) -> pd.DataFrame:
-        frame.columns = frame.columns.str.title()
+        frame.rename(columns={'STATION': 'Station', 'NAME': 'Name', 'DATE': 'Date', 'TEMP': 'Temp'}, inplace=True)
 
         if frame.shape[0] == 0:
             if self.by_day:
@@ -177,14 +392,20 @@ class AvgTemp(object):
             else:
                 return pd.DataFrame([], columns=['Station', 'Name', 'Start_Week', 'End_Week', 'Temp'])
 
-        frame['Temp'] = (frame['Temp'] - 32) * 5 / 9  # convert Fahrenheit to Celsius
+        # convert Fahrenheit to Celsius: (T - 32) * 5 / 9 == T * 5 / 9 - 160 / 9, computed in place
+        # in float64, so that values rounded on saving are stored exactly as 2-decimal numbers
+        temp = frame['Temp'].to_numpy(dtype=np.float64, copy=True)
+        np.multiply(temp, 5 / 9, out=temp)
+        np.subtract(temp, 160 / 9, out=temp)
+        frame['Temp'] = temp
 
         if self.by_day:
             return frame
 
         # transform to weekly data format
-        frame['Week'] = frame['Date'].dt.isocalendar().week
-        frame = frame.groupby(['Station', 'Name', 'Week'], as_index=False).agg(
+        frame[['Station', 'Name']] = frame[['Station', 'Name']].astype('category')  # group by integer codes
+        frame['Week'] = week_number(frame['Date'])
+        frame = frame.groupby(['Station', 'Name', 'Week'], as_index=False, observed=True).agg(
             Start_Week=pd.NamedAgg(column='Date', aggfunc='min'),
             End_Week=pd.NamedAgg(column='Date', aggfunc='max'),
             Temp=pd.NamedAgg(column='Temp', aggfunc='mean')
@@ -194,13 +415,31 @@ class AvgTemp(object):
         return frame
 
     def load(self, frame: pd.DataFrame) -> None:
-        frame.to_csv(self.loading_path, index=False, date_format="%Y-%m-%d", float_format='%.2f')
+        save_frame(frame, self.loading_path)
 
     def run(self) -> None:
         frames = self.extract()
         frame = self.transform(frames)
         self.load(frame)
 
+    def run_parallel(self, max_workers: int = 8) -> None:
+        """
+        The same as run(), but every station is extracted and transformed in its own thread.
+        The output matches the one of run(), except that daily rows are grouped by station in code_airport order
+        instead of the order of the NOAA response.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            frames = list(executor.map(lambda station: self.transform(self._fetch_stations([station])),
+                                       self.code_airport.keys()))
+
+        frame = concat_frames(frames)
+        if self.by_day:
+            frame = restore_categories(frame, ['Station'])
+        else:
+            frame = restore_categories(frame, ['Station', 'Name'], sort_by=['Station', 'Name', 'Start_Week'])
+
+        self.load(frame)
+
 
 class Balance(object):
     """
@@ -215,7 +454,7 @@ class Balance(object):
 
         :param start_year: given start year (must be integer)
         :param end_year: given end year (must be integer)
-        :param loading_path: path to where data should be loaded (format: your_path.csv)
+        :param loading_path: path to where data should be loaded (format: your_path.feather/.parquet/.csv)
         """
 
         self.check_input_params(start_year, end_year, loading_path)
@@ -238,73 +477,100 @@ class Balance(object):
         if start_year > end_year:
             raise Exception('start_year must be <= end_year')
 
-        if re.search(r'\.csv$', loading_path) is None:
-            raise Exception('Parameter loading_path must end with \'.csv\' (Example: your_path.csv)')
+        check_loading_path(loading_path)
+
+    def _fetch_year(self, year: int, filenames: FrozenSet[str]) -> Optional[Tuple[str, pd.DataFrame]]:
+        """
+        Download and parse the balance file of the given year, None if there is no file for it.
+        """
+        if year in [1992, 1993]:
+            filename = f'57-bop_92-93.xlsx'
+        else:
+            filename = f'57-bop_{str(year)[-2:]}.xlsx'
+
+        if filename not in filenames:
+            return None
+
+        url = f'http://www.cbr.ru/vfs/statistics/credit_statistics/bop/{filename}'
+        response = _SESSION.get(url)
+        response.raise_for_status()
+        frame = pd.read_excel(io.BytesIO(response.content), skiprows=3)
+        frame.rename(columns={'Unnamed: 0': 'Parameter'}, inplace=True)
+
+        return str(year), frame
 
     def extract(self) -> Dict[str, pd.DataFrame]:
-        response = requests.get('http://www.cbr.ru/vfs/statistics/credit_statistics/bop/')
-        soup = BeautifulSoup(response.text, features="lxml")
-        filenames = []
-        for link in soup.findAll('a'):
-            match = re.search(r'57-bop_.*\.xlsx$', r'{}'.format(link.get('href')))
-            if match:
-                filenames.append(match[0])
-
-        frames = {}
-        for year in range(self.start_year, self.end_year + 1):
-            if year in [1992, 1993]:
-                filename = f'57-bop_92-93.xlsx'
-            else:
-                filename = f'57-bop_{str(year)[-2:]}.xlsx'
+        filenames = _list_bop_files('http://www.cbr.ru/vfs/statistics/credit_statistics/bop/')
 
-            if filename not in filenames:
-                continue
+        years = list(range(self.start_year, self.end_year + 1))
+        with ThreadPoolExecutor(max_workers=min(_MAX_WORKERS, len(years))) as executor:
+            results = executor.map(lambda year: self._fetch_year(year, filenames), years)
 
-            url = f'http://www.cbr.ru/vfs/statistics/credit_statistics/bop/{filename}'
-            frame = pd.read_excel(url, skiprows=3)
-            frame.rename(columns={'Unnamed: 0': 'Parameter'}, inplace=True)
-            frames[str(year)] = frame
+            frames = {}
+            for result in results:
+                if result is not None:
+                    year, frame = result
+                    frames[year] = frame
 
         return frames
 
     @staticmethod
     def transform(frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
-        empty_frame = pd.DataFrame([], columns=['Parameter', 'Amount ($M)', 'Start_Quarter', 'End_Quarter'])
+        empty_frame = pd.DataFrame([], columns=['Parameter', 'Quarter', 'Amount ($M)'])
         if len(frames) == 0:
             return empty_frame
 
+        result = []
         for year, frame in frames.items():
             if frame.shape[0] == 0:
                 continue
 
-            mapping = {}
-            for i, q in enumerate(['I квартал', 'II квартал', 'III квартал', 'IV квартал'], 1):
-                mapping[q + f' {year} г.'] = i
+            quarters = ['I квартал', 'II квартал', 'III квартал', 'IV квартал']
+            mapping = {q + f' {year} г.': i for i, q in enumerate(quarters, 1)}
 
             frame = frame.loc[:, frame.columns.isin(['Parameter'] + list(mapping.keys()))]
 
             if frame.shape[1] < 2:
-                frames[year] = empty_frame
                 continue
 
             mask = frame.isna().all(axis=1)
             if mask.any():
                 frame = frame.iloc[:mask.argmax(), :]
             frame = frame.dropna(how='all', subset=frame.columns.drop('Parameter'))
-            frame = frame.melt(id_vars=['Parameter'],
-                               value_vars=frame.columns.drop('Parameter'),
-                               var_name='Quarter',
-                               value_name='Amount ($M)')
 
-            frame['Quarter'] = frame['Quarter'].apply(lambda x: mapping[x])
-            frames[year] = frame
+            # reshape to long format row by row: one row per (parameter, quarter) pair
+            quarter_cols = frame.columns.drop('Parameter')
+            frame = pd.DataFrame({
+                'Parameter': np.repeat(frame['Parameter'].to_numpy(), len(quarter_cols)),
+                'Quarter': np.tile(quarter_cols.map(mapping).to_numpy(dtype=np.int8), frame.shape[0]),
+                'Amount ($M)': frame[quarter_cols].to_numpy().ravel()
+            })
+            result.append(frame)
 
-        return pd.concat(frames.values())
+        if len(result) == 0:
+            return empty_frame
+
+        return pd.concat(result, ignore_index=True, copy=False)
 
     def load(self, frame: pd.DataFrame) -> None:
-        frame.to_csv(self.loading_path, index=False, date_format="%Y-%m-%d", float_format='%.2f')
+        save_frame(frame, self.loading_path)
 
     def run(self) -> None:
         frames = self.extract()
         frame = self.transform(frames)
         self.load(frame)
+
+    def run_parallel(self, max_workers: int = 8) -> None:
+        """
+        The same as run(), but every year is extracted and transformed in its own thread.
+        """
+        filenames = _list_bop_files('http://www.cbr.ru/vfs/statistics/credit_statistics/bop/')
+
+        def run_year(year: int) -> pd.DataFrame:
+            result = self._fetch_year(year, filenames)
+            return self.transform(dict([result]) if result is not None else {})
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            frames = list(executor.map(run_year, range(self.start_year, self.end_year + 1)))
+
+        self.load(concat_frames(frames))